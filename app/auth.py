@@ -2,23 +2,47 @@
 API key authentication for the LLM Gateway.
 """
 
+import hashlib
 from fastapi import HTTPException, Security, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import APIKeyHeader
 from typing import Optional
-from app.config import get_api_keys
+from app.config import get_api_keys, get_api_key_hashes
 
 
-security = HTTPBearer()
+# API keys are fixed for the process lifetime, so dev mode is decided once
+_API_KEYS_EMPTY = not get_api_keys()
+
+# The raw header is read directly, avoiding HTTPBearer's credentials model.
+# In dev mode a missing Authorization header must not be rejected.
+security = APIKeyHeader(name="Authorization", auto_error=not _API_KEYS_EMPTY)
+optional_security = APIKeyHeader(name="Authorization", auto_error=False)
+
+
+def _extract_token(authorization: str) -> str:
+    """Strip an optional (case-insensitive) "Bearer " prefix from the header."""
+    if authorization[:7].lower() == "bearer ":
+        return authorization[7:]
+    return authorization
+
+
+def _is_valid_key(token: str) -> bool:
+    """
+    Check a token against the configured API keys.
+    
+    Tokens are compared by SHA-256 digest, so lookup time does not depend on
+    how many leading characters the token shares with a real key.
+    """
+    return hashlib.sha256(token.encode()).digest() in get_api_key_hashes()
 
 
 async def verify_api_key(
-    credentials: HTTPAuthorizationCredentials = Security(security)
+    authorization: Optional[str] = Security(security)
 ) -> str:
     """
     Verify API key from Authorization header.
     
     Args:
-        credentials: HTTP Bearer credentials
+        authorization: Raw Authorization header value
         
     Returns:
         The API key if valid
@@ -26,15 +50,13 @@ async def verify_api_key(
     Raises:
         HTTPException: If API key is invalid or missing
     """
-    api_keys = get_api_keys()
-    
     # If no API keys are configured, allow all requests (development mode)
-    if not api_keys:
+    if _API_KEYS_EMPTY:
         return "dev-mode"
     
-    token = credentials.credentials
+    token = _extract_token(authorization)
     
-    if token not in api_keys:
+    if not _is_valid_key(token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key",
@@ -44,22 +66,21 @@ async def verify_api_key(
     return token
 
 
-def get_optional_api_key(
-    credentials: Optional[HTTPAuthorizationCredentials] = Security(security)
+async def get_optional_api_key(
+    authorization: Optional[str] = Security(optional_security)
 ) -> Optional[str]:
     """
     Get API key if provided, but don't require it.
     Useful for optional authentication endpoints.
     """
-    if credentials is None:
+    if authorization is None:
         return None
     
-    api_keys = get_api_keys()
-    if not api_keys:
+    if _API_KEYS_EMPTY:
         return "dev-mode"
     
-    token = credentials.credentials
-    if token in api_keys:
+    token = _extract_token(authorization)
+    if _is_valid_key(token):
         return token
     
     return None
@@ -3,13 +3,21 @@ Configuration management and model registry.
 Loads model configurations from YAML and environment variables.
 """
 
+import hashlib
 import os
+import orjson
 import yaml
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 
 class Settings(BaseSettings):
     """Application settings from environment variables."""
@@ -23,6 +31,7 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
     workers: int = 4
+    reload: bool = Field(default=False, description="Auto-reload on code changes (development only)")
     
     # Authentication
     api_keys: str = Field(default="", description="Comma-separated list of valid API keys")
@@ -37,11 +46,16 @@ class Settings(BaseSettings):
     redis_port: int = 6379
     redis_db: int = 0
     
+    # Batch Processing
+    batch_concurrency: int = Field(default=8, ge=1, description="Max concurrent backend requests per batch job")
+    batch_workers: int = Field(default=4, ge=1, description="Batch jobs processed concurrently per worker process")
+    
     # Database Configuration (for logging)
     database_url: Optional[str] = Field(None, env="DATABASE_URL")
     
     # Logging
     log_level: str = "INFO"
+    log_file: Optional[str] = Field(None, description="Append logs to this file instead of stderr")
     
     class Config:
         env_file = ".env"
@@ -55,6 +69,8 @@ class ModelConfig:
         self.config_path = Path(config_path)
         self.models: Dict[str, Any] = {}
         self.defaults: Dict[str, Any] = {}
+        self.backend_model: Dict[str, str] = {}
+        self.model_ids_csv: str = ""
         self._load_config()
     
     def _load_config(self):
@@ -62,8 +78,7 @@ class ModelConfig:
         if not self.config_path.exists():
             raise FileNotFoundError(f"Model config file not found: {self.config_path}")
         
-        with open(self.config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = self._read_config()
         
         self.models = config.get('models', {})
         self.defaults = config.get('defaults', {})
@@ -75,6 +90,62 @@ class ModelConfig:
                 if base_url.startswith('${') and base_url.endswith('}'):
                     env_var = base_url[2:-1]
                     model_config['base_url'] = os.getenv(env_var, '')
+        
+        # Logical model ID -> backend model name, for direct lookups on hot paths
+        self.backend_model = {
+            model_id: model_config['model_name']
+            for model_id, model_config in self.models.items()
+        }
+        # Listed in unknown-model errors without rebuilding it per request
+        self.model_ids_csv = ", ".join(self.models.keys())
+    
+    def _read_config(self) -> Dict[str, Any]:
+        """
+        Parse the YAML config file, reusing a cached JSON copy when unchanged.
+        
+        The cache is keyed by the file's mtime and size and holds the raw
+        parsed document, so environment substitution still runs on every load.
+        It is stored as JSON rather than pickled so that, like SafeLoader,
+        loading it can never execute code. Documents that JSON cannot
+        reproduce exactly (dates, non-string keys) are not cached, so every
+        load sees the same values.
+        """
+        stat = self.config_path.stat()
+        cache_key = [stat.st_mtime_ns, stat.st_size]
+        cache_path = self.config_path.with_name(self.config_path.name + '.cache')
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = orjson.loads(f.read())
+            if cached['key'] == cache_key:
+                return cached['config']
+        except Exception:
+            pass
+        
+        # Read as bytes so libyaml can skip the Python text decoder
+        with open(self.config_path, 'rb') as f:
+            config = yaml.load(f, Loader=_YamlLoader)
+        
+        try:
+            encoded = orjson.dumps({'key': cache_key, 'config': config})
+        except TypeError:
+            # e.g. non-string mapping keys; JSON cannot hold this document
+            return config
+        if orjson.loads(encoded)['config'] != config:
+            # e.g. YAML dates would come back from the cache as strings
+            return config
+        
+        # Write atomically so concurrent workers never read a partial file
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(encoded)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Read-only config directory; just skip caching
+            pass
+        
+        return config
     
     def get_model(self, model_id: str) -> Optional[Dict[str, Any]]:
         """Get configuration for a specific model."""
@@ -98,8 +169,21 @@ settings = Settings()
 model_registry = ModelConfig()
 
 
-def get_api_keys() -> list[str]:
-    """Get list of valid API keys from settings."""
-    if not settings.api_keys:
-        return []
-    return [key.strip() for key in settings.api_keys.split(',') if key.strip()]
+@lru_cache(maxsize=1)
+def get_api_keys() -> frozenset[str]:
+    """
+    Get the set of valid API keys from settings.
+
+    Parsed once and cached. Calling ``get_api_keys.cache_clear()`` and
+    ``get_api_key_hashes.cache_clear()`` after changing ``settings.api_keys``
+    picks up a new set of keys, but whether auth runs in dev mode (no keys
+    configured) is decided when app.auth is imported and is fixed for the
+    process lifetime.
+    """
+    return frozenset(key.strip() for key in settings.api_keys.split(',') if key.strip())
+
+
+@lru_cache(maxsize=1)
+def get_api_key_hashes() -> frozenset[bytes]:
+    """Get SHA-256 digests of the valid API keys, for timing-safe lookups."""
+    return frozenset(hashlib.sha256(key.encode()).digest() for key in get_api_keys())
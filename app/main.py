@@ -3,13 +3,32 @@ LLM Gateway API - Main application entry point.
 """
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import logging
 import time
 
 from app.config import settings, model_registry
 from app.routers import chat, batch
 from app.models.schemas import ModelInfo, ModelsListResponse
+from app.services.batch_service import batch_service
+from app.services.llm_client import llm_client
+from app.services.logging_service import configure_logging
+
+
+configure_logging()
+logger = logging.getLogger("llm_gateway.api")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open service connections on startup and close them on shutdown."""
+    await batch_service.initialize()
+    await llm_client.initialize()
+    yield
+    await batch_service.close()
+    await llm_client.aclose()
 
 
 # Create FastAPI application
@@ -18,7 +37,9 @@ app = FastAPI(
     version=settings.api_version,
     description=settings.api_description,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -34,14 +55,30 @@ app.add_middleware(
 app.include_router(chat.router)
 app.include_router(batch.router)
 
+# The model registry is immutable after startup, so the models listing is
+# built and serialized once instead of on every request.
+_MODELS_JSON = ModelsListResponse(
+    models=[
+        ModelInfo(
+            id=model_id,
+            display_name=config['display_name'],
+            description=config['description'],
+            tier=config['tier'],
+            max_tokens=config['max_tokens'],
+            supports_streaming=config.get('supports_streaming', False)
+        )
+        for model_id, config in model_registry.list_models().items()
+    ]
+).model_dump_json()
+
 
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """Add processing time header to all responses."""
-    start_time = time.time()
+    # Exposed on request.state so handlers can reuse it for latency logging
+    request.state.t0 = t0 = time.perf_counter_ns()
     response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(round(process_time * 1000, 2))
+    response.headers["X-Process-Time"] = f"{(time.perf_counter_ns() - t0) / 1e6:.2f}"
     return response
 
 
@@ -67,31 +104,25 @@ async def list_models():
     
     Returns information about all models that can be used with this API.
     """
-    models = model_registry.list_models()
-    
-    model_list = [
-        ModelInfo(
-            id=model_id,
-            display_name=config['display_name'],
-            description=config['description'],
-            tier=config['tier'],
-            max_tokens=config['max_tokens'],
-            supports_streaming=config.get('supports_streaming', False)
-        )
-        for model_id, config in models.items()
-    ]
-    
-    return ModelsListResponse(models=model_list)
+    return Response(content=_MODELS_JSON, media_type="application/json")
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for unhandled errors."""
-    return JSONResponse(
+    # Only expose messages from simple exception types; the full traceback is
+    # logged instead of being rendered into the response
+    if isinstance(exc, (ValueError, KeyError)):
+        detail = str(exc)[:512]
+    else:
+        detail = "Unexpected error"
+    logger.error("Unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
+    
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
-            "detail": str(exc)
+            "detail": detail
         }
     )
 
@@ -117,5 +148,8 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=True
+        loop="uvloop",
+        http="httptools",
+        workers=settings.workers,
+        reload=settings.reload
     )
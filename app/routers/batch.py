@@ -3,7 +3,7 @@ Batch generation endpoints router.
 """
 
 import time
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from app.models.schemas import (
     BatchGenerationRequest,
     BatchSubmissionResponse,
@@ -68,13 +68,13 @@ async def submit_batch_generation(
     if not model_registry.is_valid_model(request.model):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unknown model: {request.model}"
+            detail=f"Unknown model: {request.model}. Available models: {model_registry.model_ids_csv}"
         )
     
     # Submit job
-    job_id = batch_service.submit_batch_job(
+    job_id = await batch_service.submit_batch_job(
         model_id=request.model,
-        tasks=[{"id": task.id, "messages": task.messages} for task in request.tasks],
+        tasks=[task.model_dump() for task in request.tasks],
         max_tokens=request.max_tokens or 512,
         temperature=request.temperature or 0.7,
         top_p=request.top_p or 0.95,
@@ -109,12 +109,18 @@ async def submit_batch_generation(
 )
 async def get_batch_status(
     job_id: str,
+    wait: int = Query(
+        0, ge=0, le=30,
+        description="Seconds to wait for the job's next update before responding (long poll)"
+    ),
     api_key: str = Depends(verify_api_key)
 ):
     """
     Get the status of a batch generation job.
     
     Returns the current status and results (if completed) for the specified job.
+    With `wait`, an unfinished job's status is returned as soon as it next
+    changes, so clients can poll in a tight loop without sleeping.
     
     **Job Statuses:**
     - `queued`: Job is waiting to be processed
@@ -122,7 +128,10 @@ async def get_batch_status(
     - `completed`: Job has finished successfully
     - `failed`: Job encountered an error
     """
-    job_data = batch_service.get_job_status(job_id)
+    if wait:
+        job_data = await batch_service.wait_for_change(job_id, timeout=wait)
+    else:
+        job_data = await batch_service.get_job_status(job_id)
     
     if not job_data:
         raise HTTPException(
@@ -130,20 +139,19 @@ async def get_batch_status(
             detail=f"Job not found: {job_id}"
         )
     
-    # Convert results to proper schema
-    results = None
-    if job_data.get('results'):
-        results = [
-            BatchTaskResult(
-                id=r['id'],
-                output=r['output'],
-                usage=UsageInfo(**r['usage']),
-                error=r.get('error')
-            )
-            for r in job_data['results']
-        ]
+    # Convert finished results to proper schema (unfinished slots are None)
+    results = [
+        BatchTaskResult(
+            id=r['id'],
+            output=r['output'],
+            usage=UsageInfo(**r['usage']),
+            error=r.get('error')
+        )
+        for r in job_data.get('results') or ()
+        if r is not None
+    ] or None
     
-    return BatchStatusResponse(
+    status_response = BatchStatusResponse(
         job_id=job_data['job_id'],
         status=job_data['status'],
         submitted_at=job_data['submitted_at'],
@@ -155,3 +163,6 @@ async def get_batch_status(
         results=results,
         error=job_data.get('error')
     )
+    
+    # Already validated; serialize directly instead of via response_model
+    return Response(content=status_response.model_dump_json(), media_type="application/json")
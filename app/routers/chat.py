@@ -2,9 +2,14 @@
 Chat completions endpoint router.
 """
 
+import asyncio
+import secrets
 import time
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import AsyncIterator
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from app.models.schemas import (
     ChatCompletionRequest,
     ChatCompletionResponse,
@@ -19,6 +24,55 @@ from app.services.logging_service import logging_service
 router = APIRouter(prefix="/v1", tags=["chat"])
 
 
+async def _stream_chat_completion(
+    request: ChatCompletionRequest,
+    request_id: str,
+    backend_model: str,
+    start_ns: int,
+    received_at: datetime
+) -> AsyncIterator[bytes]:
+    """Relay backend deltas as server-sent events, then log the outcome."""
+    error = None
+    
+    try:
+        try:
+            async for chunk in llm_client.chat_completion_stream(
+                model_id=request.model,
+                messages=request.messages,
+                max_tokens=request.max_tokens or 512,
+                temperature=request.temperature or 0.7,
+                top_p=request.top_p or 0.95
+            ):
+                yield b"data: " + orjson.dumps(chunk) + b"\n\n"
+        except Exception as e:
+            # Headers are already sent, so the error is reported in-stream
+            error = str(e)
+            yield b"data: " + orjson.dumps(
+                {"error": {"message": f"Error generating completion: {error}"}}
+            ) + b"\n\n"
+        
+        yield b"data: [DONE]\n\n"
+    except (GeneratorExit, asyncio.CancelledError):
+        error = "Client disconnected"
+        raise
+    finally:
+        # Logged even when the client disconnects mid-stream; token usage is
+        # not reported for streamed completions
+        logging_service.log_completion(
+            request_id=request_id,
+            model=request.model,
+            backend_model=backend_model,
+            latency_ms=(time.perf_counter_ns() - start_ns) / 1e6,
+            prompt_tokens=0,
+            completion_tokens=0,
+            total_tokens=0,
+            status='success' if error is None else 'error',
+            error=error,
+            metadata=request.metadata,
+            timestamp=received_at
+        )
+
+
 @router.post(
     "/chat/completions",
     response_model=ChatCompletionResponse,
@@ -30,6 +84,7 @@ router = APIRouter(prefix="/v1", tags=["chat"])
 )
 async def create_chat_completion(
     request: ChatCompletionRequest,
+    http_request: Request,
     api_key: str = Depends(verify_api_key)
 ):
     """
@@ -56,14 +111,18 @@ async def create_chat_completion(
     }
     ```
     """
-    request_id = f"req-{uuid.uuid4().hex[:12]}"
-    start_time = time.time()
+    request_id = f"req-{secrets.token_hex(6)}"
+    # Set by the process-time middleware in app.main
+    start_ns = http_request.state.t0
+    # One wall-clock read shared by every log record for this request
+    received_at = datetime.utcnow()
     
     # Validate model
-    if not model_registry.is_valid_model(request.model):
+    backend_model = model_registry.backend_model.get(request.model)
+    if backend_model is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unknown model: {request.model}. Available models: {', '.join(model_registry.list_models().keys())}"
+            detail=f"Unknown model: {request.model}. Available models: {model_registry.model_ids_csv}"
         )
     
     # Log request
@@ -72,9 +131,16 @@ async def create_chat_completion(
         endpoint="/v1/chat/completions",
         model=request.model,
         api_key=api_key,
-        metadata=request.metadata
+        metadata=request.metadata,
+        timestamp=received_at
     )
     
+    if request.stream:
+        return StreamingResponse(
+            _stream_chat_completion(request, request_id, backend_model, start_ns, received_at),
+            media_type="text/event-stream"
+        )
+    
     try:
         # Call LLM
         response = await llm_client.chat_completion(
@@ -82,16 +148,11 @@ async def create_chat_completion(
             messages=request.messages,
             max_tokens=request.max_tokens or 512,
             temperature=request.temperature or 0.7,
-            top_p=request.top_p or 0.95,
-            stream=request.stream or False
+            top_p=request.top_p or 0.95
         )
         
         # Calculate latency
-        latency_ms = (time.time() - start_time) * 1000
-        
-        # Get backend model name
-        model_config = model_registry.get_model(request.model)
-        backend_model = model_config['model_name']
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1e6
         
         # Log completion
         logging_service.log_completion(
@@ -103,27 +164,31 @@ async def create_chat_completion(
             completion_tokens=response.usage.completion_tokens,
             total_tokens=response.usage.total_tokens,
             status='success',
-            metadata=request.metadata
+            metadata=request.metadata,
+            timestamp=received_at
         )
         
-        return response
+        # Built from the SDK's typed response with model_construct (not
+        # validated); serialize directly instead of via response_model
+        return Response(content=response.model_dump_json(), media_type="application/json")
         
     except Exception as e:
         # Calculate latency
-        latency_ms = (time.time() - start_time) * 1000
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1e6
         
         # Log error
         logging_service.log_completion(
             request_id=request_id,
             model=request.model,
-            backend_model=model_registry.get_model(request.model)['model_name'],
+            backend_model=backend_model,
             latency_ms=latency_ms,
             prompt_tokens=0,
             completion_tokens=0,
             total_tokens=0,
             status='error',
             error=str(e),
-            metadata=request.metadata
+            metadata=request.metadata,
+            timestamp=received_at
         )
         
         raise HTTPException(
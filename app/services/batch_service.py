@@ -2,39 +2,72 @@
 Batch job management service using Redis queue.
 """
 
+import asyncio
 import json
+import secrets
 import time
-import uuid
+import orjson
 from typing import Dict, Any, Optional, List
-from redis import Redis
+from redis.asyncio import Redis
 from app.config import settings
 
 
+# Job keys expire from Redis 24 hours after submission
+_JOB_TTL = 86400
+
+# Statuses after which a job no longer changes
+_FINAL_STATUSES = ('completed', 'failed')
+
+
+def _dumps(value: Any) -> bytes:
+    """Encode a stored value, falling back to json for what orjson rejects."""
+    try:
+        return orjson.dumps(value)
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits in user-supplied batch_metadata
+        return json.dumps(value).encode()
+
+
+def _events_channel(job_id: str) -> str:
+    """Pub/sub channel notified whenever a job is updated."""
+    return f"job:events:{job_id}"
+
+
 class BatchService:
     """Service for managing batch generation jobs."""
     
     def __init__(self):
+        # The client is created in initialize() so it binds to the running loop
         self.redis_client: Optional[Redis] = None
-        self._initialize_redis()
+        self._in_memory_jobs: Dict[str, Dict[str, Any]] = {}
+        # In-memory fallback queue; Redis mode uses the batch_queue list
+        self._in_memory_queue: asyncio.Queue = asyncio.Queue()
+        # Per-job events for in-memory long polls; Redis mode uses pub/sub
+        self._in_memory_events: Dict[str, asyncio.Event] = {}
     
-    def _initialize_redis(self):
+    async def initialize(self):
         """Initialize Redis connection."""
         try:
             self.redis_client = Redis(
                 host=settings.redis_host,
                 port=settings.redis_port,
                 db=settings.redis_db,
-                decode_responses=True
+                decode_responses=False  # values are orjson bytes
             )
             # Test connection
-            self.redis_client.ping()
+            await self.redis_client.ping()
         except Exception as e:
             print(f"Warning: Redis not available: {e}")
             print("Batch operations will use in-memory storage (not production-ready)")
             self.redis_client = None
-            self._in_memory_jobs: Dict[str, Dict[str, Any]] = {}
     
-    def submit_batch_job(
+    async def close(self):
+        """Close the Redis connection."""
+        if self.redis_client:
+            await self.redis_client.aclose()
+            self.redis_client = None
+    
+    async def submit_batch_job(
         self,
         model_id: str,
         tasks: List[Dict[str, Any]],
@@ -57,7 +90,7 @@ class BatchService:
         Returns:
             Job ID
         """
-        job_id = f"batch-{uuid.uuid4().hex[:12]}"
+        job_id = f"batch-{secrets.token_hex(6)}"
         submitted_at = int(time.time())
         
         job_data = {
@@ -75,45 +108,70 @@ class BatchService:
             'task_count': len(tasks),
             'completed_count': 0,
             'failed_count': 0,
-            'results': None,
+            # One slot per task, filled in task order as results arrive
+            'results': [None] * len(tasks),
             'error': None
         }
         
         if self.redis_client:
-            # Store job data in Redis
-            self.redis_client.set(
-                f"job:{job_id}",
-                json.dumps(job_data),
-                ex=86400  # Expire after 24 hours
-            )
-            # Add to queue
-            self.redis_client.lpush('batch_queue', job_id)
+            # Small mutable fields go in a hash so status updates only rewrite
+            # what changed; tasks are stored once and results are set per slot
+            meta = {
+                key: _dumps(value)
+                for key, value in job_data.items()
+                if key not in ('tasks', 'results')
+            }
+            pipe = self.redis_client.pipeline()
+            pipe.hset(f"job:meta:{job_id}", mapping=meta)
+            pipe.expire(f"job:meta:{job_id}", _JOB_TTL)
+            pipe.set(f"job:tasks:{job_id}", _dumps(tasks), ex=_JOB_TTL)
+            if tasks:
+                pipe.rpush(f"job:results:{job_id}", *[b'null'] * len(tasks))
+                pipe.expire(f"job:results:{job_id}", _JOB_TTL)
+            pipe.lpush('batch_queue', job_id)
+            await pipe.execute()
         else:
             # In-memory fallback
             self._in_memory_jobs[job_id] = job_data
+            self._in_memory_queue.put_nowait(job_id)
         
         return job_id
     
-    def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+    async def get_job_status(
+        self,
+        job_id: str,
+        include_tasks: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Get the status of a batch job.
         
         Args:
             job_id: Job identifier
+            include_tasks: Also load the job's task list (needed by workers)
             
         Returns:
-            Job data or None if not found
+            Job data or None if not found; unfinished result slots are None
         """
         if self.redis_client:
-            job_data_str = self.redis_client.get(f"job:{job_id}")
-            if job_data_str:
-                return json.loads(job_data_str)
+            pipe = self.redis_client.pipeline()
+            pipe.hgetall(f"job:meta:{job_id}")
+            pipe.lrange(f"job:results:{job_id}", 0, -1)
+            if include_tasks:
+                pipe.get(f"job:tasks:{job_id}")
+            meta, results, *tasks = await pipe.execute()
+            
+            if meta:
+                job_data = {key.decode(): orjson.loads(value) for key, value in meta.items()}
+                job_data['results'] = [orjson.loads(r) for r in results] or None
+                if include_tasks:
+                    job_data['tasks'] = orjson.loads(tasks[0]) if tasks[0] else []
+                return job_data
         else:
             return self._in_memory_jobs.get(job_id)
         
         return None
     
-    def update_job_status(
+    async def update_job_status(
         self,
         job_id: str,
         status: str,
@@ -129,51 +187,145 @@ class BatchService:
             results: Job results (if completed)
             error: Error message (if failed)
         """
-        job_data = self.get_job_status(job_id)
-        if not job_data:
-            return
+        if self.redis_client:
+            started_at = await self.redis_client.hget(f"job:meta:{job_id}", 'started_at')
+            if started_at is None:
+                return
+            started_at = orjson.loads(started_at)
+        else:
+            job_data = self._in_memory_jobs.get(job_id)
+            if not job_data:
+                return
+            started_at = job_data['started_at']
         
-        job_data['status'] = status
+        updates: Dict[str, Any] = {'status': status}
         
-        if status == 'processing' and not job_data['started_at']:
-            job_data['started_at'] = int(time.time())
+        if status == 'processing' and not started_at:
+            updates['started_at'] = int(time.time())
         
         if status in ['completed', 'failed']:
-            job_data['completed_at'] = int(time.time())
+            updates['completed_at'] = int(time.time())
         
         if results:
-            job_data['results'] = results
-            job_data['completed_count'] = sum(1 for r in results if not r.get('error'))
-            job_data['failed_count'] = sum(1 for r in results if r.get('error'))
+            updates['completed_count'] = sum(1 for r in results if not r.get('error'))
+            updates['failed_count'] = sum(1 for r in results if r.get('error'))
         
         if error:
-            job_data['error'] = error
+            updates['error'] = error
         
         if self.redis_client:
-            self.redis_client.set(
-                f"job:{job_id}",
-                json.dumps(job_data),
-                ex=86400
+            pipe = self.redis_client.pipeline()
+            pipe.hset(
+                f"job:meta:{job_id}",
+                mapping={key: orjson.dumps(value) for key, value in updates.items()}
             )
+            if results:
+                pipe.delete(f"job:results:{job_id}")
+                pipe.rpush(f"job:results:{job_id}", *(orjson.dumps(r) for r in results))
+                pipe.expire(f"job:results:{job_id}", _JOB_TTL)
+            pipe.publish(_events_channel(job_id), status)
+            await pipe.execute()
         else:
-            self._in_memory_jobs[job_id] = job_data
+            job_data.update(updates)
+            if results:
+                job_data['results'] = results
+            self._notify_in_memory(job_id)
     
-    def get_next_job(self) -> Optional[str]:
+    async def set_result(self, job_id: str, index: int, result: Dict[str, Any]):
+        """
+        Record the result of a single finished task.
+        
+        Args:
+            job_id: Job identifier
+            index: Position of the task in the job's task list
+            result: Task result with 'id', 'output', 'usage' and 'error'
         """
-        Get the next job from the queue.
+        count_field = 'failed_count' if result.get('error') else 'completed_count'
         
+        if self.redis_client:
+            pipe = self.redis_client.pipeline()
+            pipe.lset(f"job:results:{job_id}", index, orjson.dumps(result))
+            pipe.hincrby(f"job:meta:{job_id}", count_field, 1)
+            pipe.publish(_events_channel(job_id), count_field)
+            await pipe.execute()
+        else:
+            job_data = self._in_memory_jobs.get(job_id)
+            if not job_data:
+                return
+            job_data['results'][index] = result
+            job_data[count_field] += 1
+            self._notify_in_memory(job_id)
+    
+    async def wait_for_change(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a batch job, first waiting for its next update
+        if it has not finished yet.
+        
+        Args:
+            job_id: Job identifier
+            timeout: Maximum seconds to wait for an update
+            
+        Returns:
+            Job data or None if not found
+        """
+        if self.redis_client:
+            pubsub = self.redis_client.pubsub()
+            try:
+                # Subscribe before reading so an update in between is not missed
+                await pubsub.subscribe(_events_channel(job_id))
+                job_data = await self.get_job_status(job_id)
+                if job_data and job_data['status'] not in _FINAL_STATUSES:
+                    if await self._wait_for_message(pubsub, timeout):
+                        job_data = await self.get_job_status(job_id)
+                return job_data
+            finally:
+                await pubsub.aclose()
+        else:
+            job_data = self._in_memory_jobs.get(job_id)
+            if not job_data or job_data['status'] in _FINAL_STATUSES:
+                return job_data
+            event = self._in_memory_events.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return self._in_memory_jobs.get(job_id)
+    
+    @staticmethod
+    async def _wait_for_message(pubsub, timeout: float) -> bool:
+        """Wait for a published message; returns False on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (remaining := deadline - loop.time()) > 0:
+            if await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining):
+                return True
+        return False
+    
+    def _notify_in_memory(self, job_id: str):
+        """Wake every in-memory long poll waiting on a job."""
+        event = self._in_memory_events.pop(job_id, None)
+        if event is not None:
+            event.set()
+    
+    async def get_next_job(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Wait for the next job from the queue.
+        
+        Args:
+            timeout: Seconds to wait for a job (None waits indefinitely)
+            
         Returns:
-            Job ID or None if queue is empty
+            Job ID or None if no job arrived within the timeout
         """
         if self.redis_client:
-            job_id = self.redis_client.rpop('batch_queue')
-            return job_id
+            # BRPOP blocks server-side, so workers wake as soon as a job is pushed
+            item = await self.redis_client.brpop('batch_queue', timeout=timeout or 0)
+            return item[1].decode() if item else None
         else:
-            # In-memory fallback: find first queued job
-            for job_id, job_data in self._in_memory_jobs.items():
-                if job_data['status'] == 'queued':
-                    return job_id
-            return None
+            try:
+                return await asyncio.wait_for(self._in_memory_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
 
 
 # Global batch service instance
@@ -3,28 +3,94 @@ LLM client service for communicating with different model backends.
 Supports OpenAI and OpenAI-compatible APIs.
 """
 
+import asyncio
+import operator
+import secrets
 import time
-import uuid
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
+import httpx
 from openai import OpenAI, AsyncOpenAI
 from app.models.schemas import Message, ChatCompletionResponse, ChatChoice, UsageInfo
 from app.config import model_registry, settings
 
 
+# Fetches (role, content) from a Message in a single C-level call
+_role_content = operator.attrgetter('role', 'content')
+
+
+def _messages_to_dicts(messages: List[Union[Message, Dict[str, str]]]) -> List[Dict[str, str]]:
+    """
+    Convert messages to dict format.
+    
+    Batch tasks are loaded from storage with their messages already as dicts;
+    those lists are passed through untouched instead of being rebuilt.
+    """
+    if not messages or isinstance(messages[0], dict):
+        return messages
+    return [{"role": role, "content": content} for role, content in map(_role_content, messages)]
+
+
 class LLMClient:
     """Client for interacting with LLM backends."""
     
     def __init__(self):
         self.clients: Dict[str, AsyncOpenAI] = {}
+        self._model_cfg_cache: Dict[str, Dict[str, Any]] = {}
+        # Models served by the same backend share one OpenAI client
+        self._backend_clients: Dict[Tuple[Optional[str], str, float], AsyncOpenAI] = {}
+        # The pool is created in initialize() so each startup gets a fresh one
+        self._http: Optional[httpx.AsyncClient] = None
+    
+    async def initialize(self):
+        """Open the HTTP connection pool shared by every backend client."""
+        # One connection pool for every backend, so keep-alive connections
+        # and TLS sessions are reused across models
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            http2=True,
+            timeout=60.0
+        )
+    
+    async def aclose(self):
+        """Close the shared HTTP connection pool."""
+        if self._http:
+            await self._http.aclose()
+            self._http = None
+        # Cached clients are bound to the closed pool
+        self.clients.clear()
+        self._backend_clients.clear()
     
-    def _get_client(self, model_id: str) -> AsyncOpenAI:
-        """Get or create an OpenAI client for the specified model."""
-        if model_id in self.clients:
-            return self.clients[model_id]
+    def _cfg(self, model_id: str) -> Dict[str, Any]:
+        """Get the registry config for a model, memoized until invalidated."""
+        model_config = self._model_cfg_cache.get(model_id)
+        if model_config is None:
+            model_config = model_registry.get_model(model_id)
+            if not model_config:
+                raise ValueError(f"Unknown model: {model_id}")
+            self._model_cfg_cache[model_id] = model_config
+        return model_config
+    
+    def invalidate(self, model_id: Optional[str] = None):
+        """
+        Drop the cached config and client for a model, or for all models.
+        
+        Call this after the model registry is reloaded.
+        """
+        if model_id is None:
+            self._model_cfg_cache.clear()
+            self.clients.clear()
+            self._backend_clients.clear()
+        else:
+            self._model_cfg_cache.pop(model_id, None)
+            self.clients.pop(model_id, None)
+    
+    def _get_client(self, model_id: str) -> Tuple[AsyncOpenAI, Dict[str, Any]]:
+        """Get or create an OpenAI client for the specified model, with its config."""
+        model_config = self._cfg(model_id)
         
-        model_config = model_registry.get_model(model_id)
-        if not model_config:
-            raise ValueError(f"Unknown model: {model_id}")
+        client = self.clients.get(model_id)
+        if client is not None:
+            return client, model_config
         
         backend_type = model_config.get('backend_type', 'openai_compatible')
         base_url = model_config.get('base_url')
@@ -36,48 +102,45 @@ class LLMClient:
             # For OpenAI-compatible backends, use a dummy key if not specified
             api_key = "dummy-key"
         
-        # Create async client
-        client = AsyncOpenAI(
-            api_key=api_key,
-            base_url=base_url if base_url else None,
-            timeout=model_config.get('timeout', 60.0)
-        )
+        base_url = base_url if base_url else None
+        timeout = model_config.get('timeout', 60.0)
+        backend_key = (base_url, api_key, timeout)
+        
+        client = self._backend_clients.get(backend_key)
+        if client is None:
+            # Create async client
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=timeout,
+                http_client=self._http
+            )
+            self._backend_clients[backend_key] = client
         
         self.clients[model_id] = client
-        return client
+        return client, model_config
     
-    async def chat_completion(
+    async def _chat_completion_raw(
         self,
         model_id: str,
-        messages: List[Message],
+        messages: List[Union[Message, Dict[str, str]]],
         max_tokens: int = 512,
         temperature: float = 0.7,
-        top_p: float = 0.95,
-        stream: bool = False
-    ) -> ChatCompletionResponse:
+        top_p: float = 0.95
+    ) -> Dict[str, Any]:
         """
-        Execute a chat completion request.
+        Execute a chat completion request without building response models.
+        
+        Takes the same arguments as chat_completion.
         
-        Args:
-            model_id: Logical model identifier
-            messages: List of conversation messages
-            max_tokens: Maximum tokens to generate
-            temperature: Sampling temperature
-            top_p: Nucleus sampling parameter
-            stream: Whether to stream the response
-            
         Returns:
-            ChatCompletionResponse with the model's output
+            Dict with 'content', 'finish_reason', 'usage' (token counts) and 'created'
         """
-        model_config = model_registry.get_model(model_id)
-        if not model_config:
-            raise ValueError(f"Unknown model: {model_id}")
-        
-        client = self._get_client(model_id)
+        client, model_config = self._get_client(model_id)
         backend_model_name = model_config['model_name']
         
         # Convert messages to dict format
-        messages_dict = [{"role": msg.role, "content": msg.content} for msg in messages]
+        messages_dict = _messages_to_dicts(messages)
         
         # Call the model
         start_time = time.time()
@@ -88,100 +151,245 @@ class LLMClient:
                 messages=messages_dict,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                top_p=top_p,
-                stream=stream
-            )
-            
-            # Convert response to our schema
-            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
-            created_at = int(start_time)
-            
-            choice = ChatChoice(
-                index=0,
-                message=Message(
-                    role="assistant",
-                    content=response.choices[0].message.content or ""
-                ),
-                finish_reason=response.choices[0].finish_reason
+                top_p=top_p
             )
             
-            usage = UsageInfo(
-                prompt_tokens=response.usage.prompt_tokens if response.usage else 0,
-                completion_tokens=response.usage.completion_tokens if response.usage else 0,
-                total_tokens=response.usage.total_tokens if response.usage else 0
-            )
+            choice = response.choices[0]
+            usage = response.usage
             
-            return ChatCompletionResponse(
-                id=completion_id,
-                model=model_id,
-                created=created_at,
-                choices=[choice],
-                usage=usage
-            )
+            return {
+                'content': choice.message.content or "",
+                'finish_reason': choice.finish_reason,
+                'usage': {
+                    'prompt_tokens': usage.prompt_tokens,
+                    'completion_tokens': usage.completion_tokens,
+                    'total_tokens': usage.total_tokens
+                } if usage else {
+                    'prompt_tokens': 0,
+                    'completion_tokens': 0,
+                    'total_tokens': 0
+                },
+                'created': int(start_time)
+            }
             
         except Exception as e:
             raise RuntimeError(f"Error calling model {model_id}: {str(e)}")
     
-    async def batch_chat_completion(
+    async def chat_completion(
         self,
         model_id: str,
-        tasks: List[Dict[str, Any]],
+        messages: List[Union[Message, Dict[str, str]]],
         max_tokens: int = 512,
         temperature: float = 0.7,
         top_p: float = 0.95
-    ) -> List[Dict[str, Any]]:
+    ) -> ChatCompletionResponse:
         """
-        Execute multiple chat completion requests.
+        Execute a chat completion request.
         
         Args:
             model_id: Logical model identifier
-            tasks: List of tasks, each with 'id' and 'messages'
-            max_tokens: Maximum tokens per task
+            messages: List of conversation messages (models or role/content dicts)
+            max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             top_p: Nucleus sampling parameter
             
         Returns:
-            List of results, each with 'id', 'output', 'usage', and optional 'error'
+            ChatCompletionResponse with the model's output
+        """
+        raw = await self._chat_completion_raw(
+            model_id=model_id,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p
+        )
+        
+        # Values come straight from the backend SDK's typed response, so the
+        # models are constructed without re-running validation
+        return ChatCompletionResponse.model_construct(
+            id=f"chatcmpl-{secrets.token_hex(6)}",
+            model=model_id,
+            created=raw['created'],
+            choices=[
+                ChatChoice.model_construct(
+                    index=0,
+                    message=Message.model_construct(role="assistant", content=raw['content']),
+                    finish_reason=raw['finish_reason']
+                )
+            ],
+            usage=UsageInfo.model_construct(**raw['usage'])
+        )
+    
+    async def chat_completion_stream(
+        self,
+        model_id: str,
+        messages: List[Union[Message, Dict[str, str]]],
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 0.95
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a streaming chat completion request.
+        
+        Args:
+            model_id: Logical model identifier
+            messages: List of conversation messages (models or role/content dicts)
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            
+        Yields:
+            OpenAI-compatible ``chat.completion.chunk`` dicts as deltas arrive
         """
-        results = []
+        client, model_config = self._get_client(model_id)
+        completion_id = f"chatcmpl-{secrets.token_hex(6)}"
+        created_at = int(time.time())
         
-        for task in tasks:
-            task_id = task['id']
-            messages = task['messages']
+        try:
+            stream = await client.chat.completions.create(
+                model=model_config['model_name'],
+                messages=_messages_to_dicts(messages),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                stream=True
+            )
             
-            try:
-                response = await self.chat_completion(
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = {}
+                if choice.delta.role:
+                    delta['role'] = choice.delta.role
+                if choice.delta.content is not None:
+                    delta['content'] = choice.delta.content
+                
+                yield {
+                    'id': completion_id,
+                    'object': 'chat.completion.chunk',
+                    'created': created_at,
+                    'model': model_id,
+                    'choices': [{
+                        'index': 0,
+                        'delta': delta,
+                        'finish_reason': choice.finish_reason
+                    }]
+                }
+                
+        except Exception as e:
+            raise RuntimeError(f"Error calling model {model_id}: {str(e)}")
+    
+    async def _run_batch_task(
+        self,
+        semaphore: asyncio.Semaphore,
+        model_id: str,
+        task: Dict[str, Any],
+        max_tokens: int,
+        temperature: float,
+        top_p: float
+    ) -> Dict[str, Any]:
+        """Run one batch task, returning its result dict (errors included)."""
+        task_id = task['id']
+        messages = task['messages']
+        
+        try:
+            async with semaphore:
+                raw = await self._chat_completion_raw(
                     model_id=model_id,
                     messages=messages,
                     max_tokens=max_tokens,
                     temperature=temperature,
                     top_p=top_p
                 )
-                
-                results.append({
-                    'id': task_id,
-                    'output': response.choices[0].message.content,
-                    'usage': {
-                        'prompt_tokens': response.usage.prompt_tokens,
-                        'completion_tokens': response.usage.completion_tokens,
-                        'total_tokens': response.usage.total_tokens
-                    },
-                    'error': None
-                })
-                
-            except Exception as e:
-                results.append({
-                    'id': task_id,
-                    'output': '',
-                    'usage': {
-                        'prompt_tokens': 0,
-                        'completion_tokens': 0,
-                        'total_tokens': 0
-                    },
-                    'error': str(e)
-                })
-        
-        return results
+            
+            return {
+                'id': task_id,
+                'output': raw['content'],
+                'usage': raw['usage'],
+                'error': None
+            }
+            
+        except Exception as e:
+            return {
+                'id': task_id,
+                'output': '',
+                'usage': {
+                    'prompt_tokens': 0,
+                    'completion_tokens': 0,
+                    'total_tokens': 0
+                },
+                'error': str(e)
+            }
+    
+    async def batch_chat_completion(
+        self,
+        model_id: str,
+        tasks: List[Dict[str, Any]],
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 0.95,
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute multiple chat completion requests concurrently.
+        
+        Args:
+            model_id: Logical model identifier
+            tasks: List of tasks, each with 'id' and 'messages'
+            max_tokens: Maximum tokens per task
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            max_concurrency: Max in-flight requests (defaults to settings.batch_concurrency)
+            
+        Returns:
+            List of results in task order, each with 'id', 'output', 'usage', and optional 'error'
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.batch_concurrency)
+        
+        # gather preserves task order in the returned list
+        return await asyncio.gather(*[
+            self._run_batch_task(semaphore, model_id, task, max_tokens, temperature, top_p)
+            for task in tasks
+        ])
+    
+    async def batch_chat_completion_iter(
+        self,
+        model_id: str,
+        tasks: List[Dict[str, Any]],
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 0.95,
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Execute multiple chat completion requests concurrently, yielding
+        each result as soon as its task finishes.
+        
+        Takes the same arguments as batch_chat_completion.
+        
+        Yields:
+            (task index, result dict) pairs in completion order
+        
+        Closing the generator early cancels the tasks that have not finished.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.batch_concurrency)
+        
+        async def _indexed(index: int, task: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+            return index, await self._run_batch_task(
+                semaphore, model_id, task, max_tokens, temperature, top_p
+            )
+        
+        pending = [
+            asyncio.create_task(_indexed(index, task))
+            for index, task in enumerate(tasks)
+        ]
+        try:
+            for next_result in asyncio.as_completed(pending):
+                yield await next_result
+        finally:
+            for task in pending:
+                task.cancel()
 
 
 # Global client instance
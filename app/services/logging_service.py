@@ -2,18 +2,139 @@
 Logging service for tracking API usage and performance.
 """
 
+import atexit
 import json
-import time
-from typing import Dict, Any, Optional
+import queue
+import sys
+from typing import Dict, Any, Optional, Union
 from datetime import datetime
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import orjson
+from app.config import settings
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def _isoformat_utc(value: datetime) -> str:
+    """Render a datetime like orjson with OPT_NAIVE_UTC: naive values are UTC."""
+    if value.tzinfo is None:
+        return f"{value.isoformat()}+00:00"
+    return value.isoformat()
+
+
+def _json_default(value: Any) -> str:
+    """json.dumps fallback matching how orjson renders log record values."""
+    if isinstance(value, datetime):
+        return _isoformat_utc(value)
+    return str(value)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter that serializes dict messages to JSON.
+    
+    Template messages are %-formatted as usual, with datetime arguments
+    rendered the same way orjson renders them in dict messages.
+    """
+    
+    # Naive datetimes are UTC; non-string keys are stringified like json.dumps
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+    
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            try:
+                record.msg = orjson.dumps(record.msg, option=self._ORJSON_OPTIONS).decode()
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits in user-supplied metadata
+                record.msg = json.dumps(record.msg, default=_json_default)
+        elif isinstance(record.args, tuple):
+            record.args = tuple(
+                _isoformat_utc(arg) if isinstance(arg, datetime) else arg
+                for arg in record.args
+            )
+        return super().format(record)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _UnflushedStreamHandler(logging.StreamHandler):
+    """StreamHandler that writes without flushing; the listener flushes it."""
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchingQueueListener(QueueListener):
+    """QueueListener that flushes its handlers once the queue runs dry."""
+    
+    def dequeue(self, block: bool):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+        return self.queue.get(block)
+
+
+def _open_log_stream():
+    """Open the log sink with a 64KB buffer so bursts go out in few writes."""
+    if settings.log_file:
+        return open(settings.log_file, 'a', buffering=65536, encoding='utf-8')
+    return open(sys.stderr.fileno(), 'w', buffering=65536, encoding='utf-8', closefd=False)
+
+
+# Library default: records are dropped until the application entry point
+# calls configure_logging()
+logger = logging.getLogger("llm_gateway")
+logger.addHandler(logging.NullHandler())
+
+_log_listener: Optional[QueueListener] = None
+
+
+def configure_logging():
+    """
+    Install the gateway's log handlers; call once from each entry point.
+    
+    Records are formatted and written on a background thread, so request
+    handlers only pay for enqueueing them.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    handler = _UnflushedStreamHandler(_open_log_stream())
+    handler.setFormatter(JsonFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    log_queue: queue.Queue = queue.Queue(-1)
+    _log_listener = _BatchingQueueListener(log_queue, handler, respect_handler_level=True)
+    _log_listener.start()
+    
+    def _stop_log_listener():
+        """Drain the log queue and flush the sink at interpreter exit."""
+        _log_listener.stop()
+        handler.flush()
+    
+    atexit.register(_stop_log_listener)
+    
+    # Accept any case, e.g. LOG_LEVEL=info
+    logger.setLevel(settings.log_level.upper())
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    # Dict messages are only serialized by our own handler
+    logger.propagate = False
+
+# Pre-rendered JSON for the most frequent record, filled in lazily by the
+# listener thread. Only trusted identifiers go in the string slots; records
+# with an error or metadata take the dict path, which escapes properly.
+_COMPLETION_TEMPLATE = (
+    '{"event":"request_completed","request_id":"%s","model":"%s",'
+    '"backend_model":"%s","latency_ms":%.2f,'
+    '"tokens":{"prompt":%d,"completion":%d,"total":%d},'
+    '"status":"%s","error":null,"metadata":null,"timestamp":"%s"}'
 )
-logger = logging.getLogger(__name__)
 
 
 class LoggingService:
@@ -28,7 +149,8 @@ class LoggingService:
         endpoint: str,
         model: str,
         api_key: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[datetime] = None
     ):
         """
         Log an incoming API request.
@@ -39,7 +161,11 @@ class LoggingService:
             model: Model being requested
             api_key: API key used (masked)
             metadata: Additional request metadata
+            timestamp: Wall-clock time (UTC) to record; defaults to now
         """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         log_data = {
             'event': 'request_received',
             'request_id': request_id,
@@ -47,10 +173,10 @@ class LoggingService:
             'model': model,
             'api_key': self._mask_api_key(api_key) if api_key else None,
             'metadata': metadata,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': timestamp or datetime.utcnow()
         }
         
-        self.logger.info(json.dumps(log_data))
+        self._emit(logging.INFO, log_data)
     
     def log_completion(
         self,
@@ -63,7 +189,8 @@ class LoggingService:
         total_tokens: int,
         status: str = 'success',
         error: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[datetime] = None
     ):
         """
         Log a completed API request.
@@ -79,7 +206,20 @@ class LoggingService:
             status: Request status (success/error)
             error: Error message if failed
             metadata: Additional metadata
+            timestamp: Wall-clock time (UTC) to record; defaults to now
         """
+        level = logging.INFO if status == 'success' else logging.ERROR
+        if not self.logger.isEnabledFor(level):
+            return
+        
+        if error is None and metadata is None:
+            self._emit(level, _COMPLETION_TEMPLATE, (
+                request_id, model, backend_model, latency_ms,
+                prompt_tokens, completion_tokens, total_tokens,
+                status, timestamp or datetime.utcnow()
+            ))
+            return
+        
         log_data = {
             'event': 'request_completed',
             'request_id': request_id,
@@ -94,13 +234,10 @@ class LoggingService:
             'status': status,
             'error': error,
             'metadata': metadata,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': timestamp or datetime.utcnow()
         }
         
-        if status == 'success':
-            self.logger.info(json.dumps(log_data))
-        else:
-            self.logger.error(json.dumps(log_data))
+        self._emit(level, log_data)
     
     def log_batch_job(
         self,
@@ -112,7 +249,8 @@ class LoggingService:
         completed_count: Optional[int] = None,
         failed_count: Optional[int] = None,
         error: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[datetime] = None
     ):
         """
         Log a batch job event.
@@ -127,7 +265,11 @@ class LoggingService:
             failed_count: Number of failed tasks
             error: Error message if failed
             metadata: Additional metadata
+            timestamp: Wall-clock time (UTC) to record; defaults to now
         """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         log_data = {
             'event': f'batch_{event}',
             'job_id': job_id,
@@ -138,10 +280,14 @@ class LoggingService:
             'failed_count': failed_count,
             'error': error,
             'metadata': metadata,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': timestamp or datetime.utcnow()
         }
         
-        self.logger.info(json.dumps(log_data))
+        self._emit(logging.INFO, log_data)
+    
+    def _emit(self, level: int, msg: Union[Dict[str, Any], str], args: tuple = ()):
+        """Log a record; JSON serialization and I/O happen on the listener thread."""
+        self.logger.log(level, msg, *args)
     
     @staticmethod
     def _mask_api_key(api_key: str) -> str:
@@ -3,7 +3,6 @@ Example script for submitting a batch generation job to the LLM Gateway.
 '''
 
 import os
-import time
 import requests
 from dotenv import load_dotenv
 
@@ -59,9 +58,13 @@ def submit_batch_job():
         }
     }
 
+    # Reuse one connection for the submission and every status check
+    session = requests.Session()
+    session.headers.update(headers)
+
     # Submit the batch job
     print("Submitting batch job...")
-    response = requests.post(f"{BASE_URL}/v1/batch/generate", json=payload, headers=headers)
+    response = session.post(f"{BASE_URL}/v1/batch/generate", json=payload)
 
     if response.status_code != 200:
         print(f"Error submitting batch job: {response.text}")
@@ -74,12 +77,15 @@ def submit_batch_job():
     print(f"Status: {job_data['status']}")
     print(f"Task Count: {job_data['task_count']}")
 
-    # Poll for job completion
-    print("\nPolling for job completion...")
+    # Long-poll for job completion: the server holds each request until the
+    # job changes (or 30 seconds pass), so there is no need to sleep
+    print("\nWaiting for job completion...")
     while True:
-        time.sleep(3)  # Wait 3 seconds between checks
-
-        status_response = requests.get(f"{BASE_URL}/v1/batch/{job_id}", headers=headers)
+        status_response = session.get(
+            f"{BASE_URL}/v1/batch/{job_id}",
+            params={"wait": 30},
+            timeout=60
+        )
 
         if status_response.status_code != 200:
             print(f"Error checking job status: {status_response.text}")
@@ -4,6 +4,7 @@ This demonstrates creating a reusable LLM client class.
 '''
 
 import os
+import functools
 import openai
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
@@ -12,6 +13,19 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+@functools.lru_cache(maxsize=64)
+def _summary_system_prompt(max_length: int) -> str:
+    '''Build (once per length) the system prompt used by summarize().'''
+    return f"You are a helpful assistant that summarizes text concisely. Limit your summary to approximately {max_length} words."
+
+
+@functools.lru_cache(maxsize=64)
+def _entity_system_prompt(entity_types: tuple) -> str:
+    '''Build (once per set of types) the system prompt used by extract_entities().'''
+    entity_list = ", ".join(entity_types)
+    return f"You are a helpful assistant that extracts named entities from text. Extract the following types: {entity_list}."
+
+
 class LLMGatewayClient:
     '''
     A reusable client for interacting with the LLM Gateway.
@@ -34,6 +48,8 @@ class LLMGatewayClient:
             base_url=self.base_url,
             api_key=self.api_key
         )
+        # Bound once so each chat() call skips the attribute chain
+        self._create = self.client.chat.completions.create
 
     def chat(
         self,
@@ -55,7 +71,7 @@ class LLMGatewayClient:
             The model's response as a string
         '''
         try:
-            response = self.client.chat.completions.create(
+            response = self._create(
                 model=model,
                 messages=messages,
                 max_tokens=max_tokens,
@@ -99,7 +115,7 @@ class LLMGatewayClient:
         Returns:
             The summary
         '''
-        system_prompt = f"You are a helpful assistant that summarizes text concisely. Limit your summary to approximately {max_length} words."
+        system_prompt = _summary_system_prompt(max_length)
         user_prompt = f"Please summarize the following text:\n\n{text}"
 
         return self.ask(user_prompt, system_prompt=system_prompt, model=model)
@@ -116,8 +132,7 @@ class LLMGatewayClient:
         Returns:
             Extracted entities as formatted text
         '''
-        entity_list = ", ".join(entity_types)
-        system_prompt = f"You are a helpful assistant that extracts named entities from text. Extract the following types: {entity_list}."
+        system_prompt = _entity_system_prompt(tuple(entity_types))
         user_prompt = f"Extract entities from this text:\n\n{text}"
 
         return self.ask(user_prompt, system_prompt=system_prompt, model=model)
@@ -4,9 +4,10 @@ Background worker for processing batch generation jobs.
 
 import asyncio
 import time
+from app.config import settings
 from app.services.batch_service import batch_service
 from app.services.llm_client import llm_client
-from app.services.logging_service import logging_service
+from app.services.logging_service import configure_logging, logging_service
 
 
 async def process_batch_job(job_id: str):
@@ -16,14 +17,14 @@ async def process_batch_job(job_id: str):
     Args:
         job_id: Job identifier to process
     """
-    job_data = batch_service.get_job_status(job_id)
+    job_data = await batch_service.get_job_status(job_id, include_tasks=True)
     
     if not job_data:
         logging_service.logger.error(f"Job not found: {job_id}")
         return
     
     # Update status to processing
-    batch_service.update_job_status(job_id, 'processing')
+    await batch_service.update_job_status(job_id, 'processing')
     
     logging_service.log_batch_job(
         job_id=job_id,
@@ -35,20 +36,31 @@ async def process_batch_job(job_id: str):
     )
     
     try:
-        # Process all tasks
-        results = await llm_client.batch_chat_completion(
+        # Process all tasks, recording each result in its task's slot as it
+        # finishes so that status polls see live progress
+        completed_count = 0
+        failed_count = 0
+        results = llm_client.batch_chat_completion_iter(
             model_id=job_data['model_id'],
             tasks=job_data['tasks'],
             max_tokens=job_data['max_tokens'],
             temperature=job_data['temperature'],
             top_p=job_data['top_p']
         )
+        try:
+            async for index, result in results:
+                await batch_service.set_result(job_id, index, result)
+                if result.get('error'):
+                    failed_count += 1
+                else:
+                    completed_count += 1
+        finally:
+            # Cancels the remaining backend calls if recording a result failed
+            await results.aclose()
         
-        # Update job with results
-        batch_service.update_job_status(
+        await batch_service.update_job_status(
             job_id=job_id,
-            status='completed',
-            results=results
+            status='completed'
         )
         
         logging_service.log_batch_job(
@@ -57,14 +69,14 @@ async def process_batch_job(job_id: str):
             model=job_data['model_id'],
             task_count=job_data['task_count'],
             status='completed',
-            completed_count=sum(1 for r in results if not r.get('error')),
-            failed_count=sum(1 for r in results if r.get('error')),
+            completed_count=completed_count,
+            failed_count=failed_count,
             metadata=job_data.get('metadata')
         )
         
     except Exception as e:
         error_msg = str(e)
-        batch_service.update_job_status(
+        await batch_service.update_job_status(
             job_id=job_id,
             status='failed',
             error=error_msg
@@ -89,21 +101,36 @@ async def worker_loop():
     
     while True:
         try:
-            # Get next job from queue
-            job_id = batch_service.get_next_job()
+            # Block until a job is queued
+            job_id = await batch_service.get_next_job()
             
             if job_id:
                 logging_service.logger.info(f"Processing job: {job_id}")
                 await process_batch_job(job_id)
-            else:
-                # No jobs in queue, wait before checking again
-                await asyncio.sleep(5)
                 
         except Exception as e:
             logging_service.logger.error(f"Worker error: {e}")
+            # Back off so a lost Redis connection doesn't spin the loop
             await asyncio.sleep(5)
 
 
+async def main():
+    """
+    Connect to Redis and run the worker loops.
+    
+    Runs settings.batch_workers loops over the shared queue, so a slow job
+    does not hold up the jobs queued behind it.
+    """
+    configure_logging()
+    await batch_service.initialize()
+    await llm_client.initialize()
+    try:
+        await asyncio.gather(*[worker_loop() for _ in range(settings.batch_workers)])
+    finally:
+        await batch_service.close()
+        await llm_client.aclose()
+
+
 if __name__ == "__main__":
     # Run the worker
-    asyncio.run(worker_loop())
+    asyncio.run(main())